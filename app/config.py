@@ -1,11 +1,18 @@
 import os
-from pydantic_settings import BaseSettings
-from typing import Optional
+from functools import lru_cache
+from pydantic import PrivateAttr
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
 
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "DEBUG")
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "2"))
+    PROFILING: bool = os.getenv("PROFILING", "false").lower() == "true"
+    HEALTH_CACHE_TTL: float = float(os.getenv("HEALTH_CACHE_TTL", "5"))
+    # JSON list in the environment, e.g. CORS_ORIGINS='["http://localhost:3000"]'
+    CORS_ORIGINS: List[str] = ["http://localhost:3000"]
     # Database settings
     POSTGRES_HOST: str = os.getenv("POSTGRES_HOST", "localhost")
     POSTGRES_PORT: int = int(os.getenv("POSTGRES_PORT", "5432"))
@@ -13,13 +20,34 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = os.getenv("POSTGRES_USER", "postgres")
     POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "password")
 
+    # Connection pool settings
+    DB_POOL_MIN: int = int(os.getenv("DB_POOL_MIN", "10"))
+    DB_POOL_MAX: int = int(os.getenv("DB_POOL_MAX", "50"))
+    DB_CMD_TIMEOUT: float = float(os.getenv("DB_CMD_TIMEOUT", "60"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: float = float(os.getenv("DB_POOL_RECYCLE", "300"))
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "1024"))
+    DB_POOL_STATS_INTERVAL: int = int(os.getenv("DB_POOL_STATS_INTERVAL", "60"))
+
     # Qdrant settings
     QDRANT_URL: str = os.getenv("QDRANT_URL", "localhost")
     QDRANT_PORT: int = int(os.getenv("QDRANT_PORT", "6333"))
+    QDRANT_GRPC_PORT: int = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+    QDRANT_PREFER_GRPC: bool = os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true"
+    # Concurrent queries are coalesced into one query_batch_points call
+    QUERY_BATCH_MAX: int = int(os.getenv("QUERY_BATCH_MAX", "32"))
+    QUERY_BATCH_FLUSH_MS: float = float(os.getenv("QUERY_BATCH_FLUSH_MS", "10"))
     COLLECTION_NAME: str = os.getenv("COLLECTION_NAME", "products_new")
 
     # Embedding settings
     MODEL_NAME: str = os.getenv("MODEL_NAME", "BAAI/bge-small-en-v1.5")
+    # Documents per ONNX inference call
+    EMBED_BATCH_SIZE: int = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+    # ONNX Runtime threads for the embedding model (0 = one per physical core)
+    EMBED_THREADS: int = int(os.getenv("EMBED_THREADS", "0"))
+    EMBED_USE_CUDA: bool = os.getenv("EMBED_USE_CUDA", "false").lower() == "true"
+    # Recently embedded texts kept in memory (0 disables the cache)
+    EMBED_CACHE_SIZE: int = int(os.getenv("EMBED_CACHE_SIZE", "10000"))
 
     # Admin settings
     ADMIN_BEARER_TOKEN: str = os.getenv("ADMIN_BEARER_TOKEN", "your-secure-admin-token")
@@ -27,13 +55,28 @@ class Settings(BaseSettings):
     # Sync settings
     DEFAULT_BATCH_SIZE: int = int(os.getenv("DEFAULT_BATCH_SIZE", "100"))
     MAX_BATCH_SIZE: int = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+    # Qdrant ingests fastest with small batches and few concurrent requests;
+    # larger values queue up on the server
+    SYNC_BATCH_SIZE: int = int(os.getenv("SYNC_BATCH_SIZE", "32"))
+    SYNC_PARALLEL_REQUESTS: int = int(os.getenv("SYNC_PARALLEL_REQUESTS", "2"))
+
+    model_config = SettingsConfigDict(env_file=".env", frozen=True)
+
+    _postgres_url: str = PrivateAttr()
+
+    def model_post_init(self, __context) -> None:
+        # Settings are frozen, so derived values can be built once
+        self._postgres_url = f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
     @property
     def postgres_url(self) -> str:
-        return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        return self._postgres_url
+
 
-    class Config:
-        env_file = ".env"
+@lru_cache
+def get_settings() -> Settings:
+    """Process-wide Settings instance, usable as a FastAPI dependency"""
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
@@ -1,10 +1,13 @@
 # Database connections (PostgreSQL, Qdrant client setup)
 import asyncpg
 import asyncio
+import time
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import Optional, AsyncGenerator
 import logging
 from app.config import settings
+from qdrant_client import AsyncQdrantClient
 
 logger = logging.getLogger(__name__)
 
@@ -12,38 +15,97 @@ logger = logging.getLogger(__name__)
 class DatabaseManager:
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
+        self._stats_task: Optional[asyncio.Task] = None
+        self._last_ok_ts: float = 0.0
 
     async def create_pool(self):
         """Create database connection pool"""
         try:
             self.pool = await asyncpg.create_pool(
-                settings.postgres_url, min_size=5, max_size=10, command_timeout=60
+                settings.postgres_url,
+                min_size=settings.DB_POOL_MIN,
+                max_size=settings.DB_POOL_MAX,
+                command_timeout=settings.DB_CMD_TIMEOUT,
+                max_inactive_connection_lifetime=settings.DB_POOL_RECYCLE,
+                # Keep prepared statements for the repeated sync SQL warm
+                statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+                max_cached_statement_lifetime=0,
+                server_settings={
+                    "application_name": "products-recommender",
+                    "jit": "off",
+                },
             )
             logger.info("Database connection pool created successfully")
+            if settings.DB_STATEMENT_CACHE_SIZE <= 0:
+                logger.warning(
+                    "DB_STATEMENT_CACHE_SIZE is 0; every query will be re-parsed and re-planned"
+                )
+            self.start_pool_stats()
         except Exception as e:
             logger.error(f"Failed to create database pool: {e}")
             raise
 
     async def close_pool(self):
         """Close database connection pool"""
+        if self._stats_task:
+            self._stats_task.cancel()
+            self._stats_task = None
         if self.pool:
             await self.pool.close()
             logger.info("Database connection pool closed")
 
+    def start_pool_stats(self):
+        """Start the background task that periodically logs pool usage"""
+        if settings.DB_POOL_STATS_INTERVAL > 0 and not self._stats_task:
+            self._stats_task = asyncio.create_task(self._log_pool_stats())
+
+    async def _log_pool_stats(self):
+        """Log pool size / idle / used connections so contention is visible"""
+        while True:
+            await asyncio.sleep(settings.DB_POOL_STATS_INTERVAL)
+            if not self.pool:
+                continue
+            size = self.pool.get_size()
+            idle = self.pool.get_idle_size()
+            logger.info(
+                f"POOL_STATS size={size} idle={idle} used={size - idle} "
+                f"max={self.pool.get_max_size()}"
+            )
+
     @asynccontextmanager
-    async def get_connection(self) -> AsyncGenerator[asyncpg.Connection, None]:
+    async def get_connection(
+        self, timeout: Optional[float] = None
+    ) -> AsyncGenerator[asyncpg.Connection, None]:
         """Get database connection from pool"""
         if not self.pool:
             await self.create_pool()
 
-        async with self.pool.acquire() as connection:
+        async with self.pool.acquire(
+            timeout=timeout if timeout is not None else settings.DB_POOL_TIMEOUT
+        ) as connection:
+            yield connection
+
+    @asynccontextmanager
+    async def use_connection(
+        self, conn: Optional[asyncpg.Connection] = None
+    ) -> AsyncGenerator[asyncpg.Connection, None]:
+        """Reuse the caller's connection if given, otherwise acquire one from the pool"""
+        if conn is not None:
+            yield conn
+            return
+        async with self.get_connection() as connection:
             yield connection
 
     async def test_connection(self) -> bool:
         """Test database connection"""
+        # A recent successful ping is good enough; don't take a pool slot
+        if time.monotonic() - self._last_ok_ts < settings.HEALTH_CACHE_TTL:
+            return True
         try:
-            async with self.get_connection() as conn:
+            # Fail fast instead of queueing behind real work when the pool is busy
+            async with self.get_connection(timeout=1.0) as conn:
                 await conn.fetchval("SELECT 1")
+                self._last_ok_ts = time.monotonic()
                 return True
         except Exception as e:
             logger.error(f"Database connection test failed: {e}")
@@ -52,3 +114,18 @@ class DatabaseManager:
 
 # Global database manager instance
 db_manager = DatabaseManager()
+
+
+@lru_cache(maxsize=None)
+def get_qdrant_client() -> AsyncQdrantClient:
+    """
+    Process-wide Qdrant client. All services share its gRPC channel and
+    connection pool instead of opening one each.
+    """
+    return AsyncQdrantClient(
+        settings.QDRANT_URL,
+        port=settings.QDRANT_PORT,
+        grpc_port=settings.QDRANT_GRPC_PORT,
+        prefer_grpc=settings.QDRANT_PREFER_GRPC,
+        timeout=60,
+    )
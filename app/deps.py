@@ -0,0 +1,20 @@
+# FastAPI dependency providers for the process-wide service instances
+from fastapi import Request
+from app.services.embedding_service import EmbeddingService
+from app.services.recommendation_service import RecommendationService
+from app.services.sync_service import SyncService
+
+
+def get_embedding_service(request: Request) -> EmbeddingService:
+    """Shared EmbeddingService created in the application lifespan"""
+    return request.app.state.embedding_service
+
+
+def get_recommendation_service(request: Request) -> RecommendationService:
+    """Shared RecommendationService created in the application lifespan"""
+    return request.app.state.recommendation_service
+
+
+def get_sync_service(request: Request) -> SyncService:
+    """Shared SyncService created in the application lifespan"""
+    return request.app.state.sync_service
@@ -1,14 +1,22 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 from app.utils.logging import logger
 import uvicorn
 from app.models.product import HealthResponse
 from app.services.embedding_service import EmbeddingService
+from app.services.recommendation_service import RecommendationService
+from app.services.sync_service import SyncService
+from app.deps import get_embedding_service
 from app.config import settings
 from app.routers import admin, products
-from app.database import db_manager
-from qdrant_client import QdrantClient
+from app.database import db_manager, get_qdrant_client
+from cachetools import TTLCache
+
+_health_cache = TTLCache(maxsize=1, ttl=settings.HEALTH_CACHE_TTL)
 
 
 @asynccontextmanager
@@ -24,6 +32,21 @@ async def lifespan(app: FastAPI):
         await db_manager.create_pool()
         logger.info("✅ Database client initialized.")
 
+        # Services are created once per process and shared via app.state;
+        # they all talk to Qdrant through one client
+        qdrant_client = get_qdrant_client()
+        embedding_service = EmbeddingService(qdrant_client)
+        await embedding_service.ensure_collection_exists()
+        # Run one inference so the first real request doesn't pay for ONNX warmup
+        await asyncio.to_thread(embedding_service.get_embeddings, ["warmup"])
+        logger.info("✅ Embedding model warmed.")
+        app.state.embedding_service = embedding_service
+        app.state.recommendation_service = RecommendationService(
+            embedding_service, qdrant_client
+        )
+        app.state.sync_service = SyncService(embedding_service)
+        logger.info("✅ Services initialized.")
+
         yield  # This is where the application starts serving requests
 
     except Exception as e:
@@ -34,6 +57,11 @@ async def lifespan(app: FastAPI):
     finally:
         # --- Shutdown Logic (runs after yield, even if errors occur during startup) ---
         logger.info("Application shutdown initiated (via lifespan).")
+        await db_manager.close_pool()
+        if hasattr(app.state, "recommendation_service"):
+            await app.state.recommendation_service.close()
+        if hasattr(app.state, "embedding_service"):
+            await get_qdrant_client().close()
 
 
 # Initialize FastAPI app
@@ -44,18 +72,38 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan,
 )
 
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["authorization", "content-type"],
 )
 
+# Compress larger responses (search / similar lists with long descriptions)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Per-request profiling: append ?profile=1 to any URL to get an HTML report
+if settings.PROFILING:
+    from fastapi import Request
+    from fastapi.responses import HTMLResponse
+    from pyinstrument import Profiler
+
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        if not request.query_params.get("profile"):
+            return await call_next(request)
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        await call_next(request)
+        profiler.stop()
+        return HTMLResponse(profiler.output_html())
+
 # --- Include Routers ---
 app.include_router(admin.router)
 app.include_router(products.router)
@@ -73,6 +121,7 @@ async def root():
             "similar_products_from_list": "/api/v1/products/similar/list",
             "semantic_search": "/api/v1/products/search",
             "admin_sync": "/api/v1/admin/sync",
+            "admin_initial_load": "/api/v1/admin/sync/initial-load",
             "admin_sync_status": "/api/v1/admin/sync/status",
             "docs": "/docs",
         },
@@ -80,13 +129,16 @@ async def root():
 
 
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(service: EmbeddingService = Depends(get_embedding_service)):
     """Health check endpoint"""
     try:
-        service = EmbeddingService()
-        collection_info = await service.get_collection_info()
+        # Probes within the TTL reuse the last Qdrant answer
+        collection_info = _health_cache.get("collection_info")
+        if collection_info is None:
+            collection_info = await service.get_collection_info()
+            _health_cache["collection_info"] = collection_info
         return HealthResponse(
-            status="healthy",
+            status="degraded" if "error" in collection_info else "healthy",
             collection_info=collection_info,
             model_name=service.model_name,
         )
@@ -95,11 +147,12 @@ async def health_check():
 
 
 if __name__ == "__main__":
-    # For development
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        loop="uvloop",
+        http="httptools",
+        workers=settings.WEB_CONCURRENCY,
         log_level="info",
     )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict
+from typing import ClassVar, Optional, Dict
 from datetime import datetime
 from uuid import UUID
 
@@ -31,16 +31,19 @@ class ProductForEmbedding(BaseModel):
     brand: str
     type: str
 
+    _TEMPLATE: ClassVar[str] = (
+        "Product: %s | Brand: %s | Category: %s | Type: %s | Description: %s"
+    )
+
     def to_text(self) -> str:
         """Convert product to text for embedding"""
-        text_parts = [
-            f"Product: {self.name}",
-            f"Brand: {self.brand}",
-            f"Category: {self.category}",
-            f"Type: {self.type}",
-            f"Description: {self.description}",
-        ]
-        return " | ".join(text_parts)
+        return self._TEMPLATE % (
+            self.name,
+            self.brand,
+            self.category,
+            self.type,
+            self.description,
+        )
 
 
 class ProductUpdate(BaseModel):
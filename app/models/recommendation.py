@@ -1,9 +1,12 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 from uuid import UUID
 
 
 class ProductRecommendation(BaseModel):
+    # Built with model_construct from Qdrant payloads; drop unknown payload keys
+    model_config = ConfigDict(extra="ignore")
+
     product_id: UUID
     name: str
     category: str
@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
+from app.config import settings
 
 
 class SyncStatus(str, Enum):
@@ -13,7 +14,7 @@ class SyncStatus(str, Enum):
 
 
 class SyncRequest(BaseModel):
-    batch_size: int = Field(default=100, ge=1, le=1000)
+    batch_size: int = Field(default=settings.SYNC_BATCH_SIZE, ge=1, le=1000)
     force_reindex: bool = Field(
         default=False, description="Force re-indexing of already indexed products"
     )
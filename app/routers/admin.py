@@ -5,6 +5,7 @@ from app.utils.auth import verify_admin_token
 from app.services.sync_service import SyncService
 from app.services.embedding_service import EmbeddingService
 from app.database import db_manager
+from app.deps import get_embedding_service, get_sync_service
 from app.models.sync import (
     SyncRequest,
     SyncResponse,
@@ -18,7 +19,11 @@ router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
 
 
 @router.post("/sync", response_model=SyncResponse)
-async def sync_products(request: SyncRequest, _: str = Depends(verify_admin_token)):
+async def sync_products(
+    request: SyncRequest,
+    _: str = Depends(verify_admin_token),
+    sync_service: SyncService = Depends(get_sync_service),
+):
     """
     Main sync endpoint to fetch products from PostgreSQL and upload embeddings to Qdrant
 
@@ -29,7 +34,6 @@ async def sync_products(request: SyncRequest, _: str = Depends(verify_admin_toke
     4. Updates qdrant_indexed to TRUE and sets qdrant_indexed_at timestamp
     """
     try:
-        sync_service = SyncService()
         result = await sync_service.sync_products(
             batch_size=request.batch_size, force_reindex=request.force_reindex
         )
@@ -40,8 +44,31 @@ async def sync_products(request: SyncRequest, _: str = Depends(verify_admin_toke
         raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
 
 
-@router.get("/sync/status", response_model=SyncStatusResponse)
-async def get_sync_status(_: str = Depends(verify_admin_token)):
+@router.post("/sync/initial-load", response_model=SyncResponse)
+async def initial_load(
+    _: str = Depends(verify_admin_token),
+    sync_service: SyncService = Depends(get_sync_service),
+):
+    """
+    Load the full product catalog into Qdrant in one bulk upload
+
+    Intended for populating an empty collection. HNSW indexing is paused
+    during the upload and restored afterwards; use /sync for incremental updates.
+    """
+    try:
+        return await sync_service.initial_load()
+
+    except Exception as e:
+        logger.error(f"Error in initial load endpoint: {e}")
+        raise HTTPException(status_code=500, detail=f"Initial load failed: {str(e)}")
+
+
+@router.get("/sync/status", responses={200: {"model": SyncStatusResponse}})
+async def get_sync_status(
+    _: str = Depends(verify_admin_token),
+    sync_service: SyncService = Depends(get_sync_service),
+    embedding_service: EmbeddingService = Depends(get_embedding_service),
+):
     """
     Get sync status information
 
@@ -51,9 +78,6 @@ async def get_sync_status(_: str = Depends(verify_admin_token)):
     - Database connection status
     """
     try:
-        sync_service = SyncService()
-        embedding_service = EmbeddingService()
-
         # Get last sync info
         last_sync = await sync_service.get_last_sync_info()
 
@@ -64,12 +88,12 @@ async def get_sync_status(_: str = Depends(verify_admin_token)):
         db_status = await db_manager.test_connection()
         qdrant_status, _ = await embedding_service.test_connection()
 
-        return SyncStatusResponse(
-            last_sync=last_sync,
-            collection_info=collection_info,
-            database_status=db_status,
-            qdrant_status=qdrant_status,
-        )
+        return {
+            "last_sync": last_sync,
+            "collection_info": collection_info,
+            "database_status": db_status,
+            "qdrant_status": qdrant_status,
+        }
 
     except Exception as e:
         logger.error(f"Error getting sync status: {e}")
@@ -79,7 +103,10 @@ async def get_sync_status(_: str = Depends(verify_admin_token)):
 
 
 @router.post("/sync/test-connection", response_model=ConnectionTestResponse)
-async def test_connections(_: str = Depends(verify_admin_token)):
+async def test_connections(
+    _: str = Depends(verify_admin_token),
+    embedding_service: EmbeddingService = Depends(get_embedding_service),
+):
     """
     Test both PostgreSQL and Qdrant connections
 
@@ -95,7 +122,6 @@ async def test_connections(_: str = Depends(verify_admin_token)):
         )
 
         # Test Qdrant connection
-        embedding_service = EmbeddingService()
         qdrant_status, qdrant_message = await embedding_service.test_connection()
 
         return ConnectionTestResponse(
@@ -9,12 +9,16 @@ from app.models.recommendation import (
     SimilarProductsListResponse
 )
 from app.services.recommendation_service import RecommendationService
+from app.deps import get_recommendation_service
 
 router = APIRouter(prefix="/api/v1/products", tags=["products"])
 
 
-@router.post("/similar", response_model=SimilarProductsResponse)
-async def get_similar_products(request: SimilarProductsRequest):
+@router.post("/similar", responses={200: {"model": SimilarProductsResponse}})
+async def get_similar_products(
+    request: SimilarProductsRequest,
+    service: RecommendationService = Depends(get_recommendation_service),
+):
     """
     Get products similar to a given product ID
 
@@ -23,7 +27,6 @@ async def get_similar_products(request: SimilarProductsRequest):
     Uses client.query_points() for direct vector similarity search.
     """
     try:
-        service = RecommendationService()
         result = await service.get_similar_products_by_id(
             product_id=request.product_id,
             limit=request.limit,
@@ -34,7 +37,7 @@ async def get_similar_products(request: SimilarProductsRequest):
         if not result["success"]:
             raise HTTPException(status_code=404, detail=result["message"])
 
-        return SimilarProductsResponse(**result)
+        return result
 
     except HTTPException:
         raise
@@ -43,15 +46,17 @@ async def get_similar_products(request: SimilarProductsRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@router.post("/similar/list", response_model=SimilarProductsListResponse)
-async def get_similar_products_from_list(request: SimilarProductsListRequest):
+@router.post("/similar/list", responses={200: {"model": SimilarProductsListResponse}})
+async def get_similar_products_from_list(
+    request: SimilarProductsListRequest,
+    service: RecommendationService = Depends(get_recommendation_service),
+):
     """ Get products similar to a given list of product IDs
 
     This endpoint takes a list of product IDs (string) and directly queries the
     vector database to find similar products based on vector similarity.
     Uses client.query_points() for direct vector similarity search. """
     try:
-        service = RecommendationService()
         result = await service.get_similar_products_from_list_of_ids(
             product_ids=request.product_ids,
             limit=request.limit,
@@ -62,7 +67,7 @@ async def get_similar_products_from_list(request: SimilarProductsListRequest):
         if not result["success"]:
             raise HTTPException(status_code=404, detail=result["message"])
 
-        return SimilarProductsListResponse(**result)
+        return result
 
     except HTTPException:
         raise
@@ -71,8 +76,11 @@ async def get_similar_products_from_list(request: SimilarProductsListRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@router.post("/search", response_model=SemanticQueryResponse)
-async def semantic_search(request: SemanticQueryRequest):
+@router.post("/search", responses={200: {"model": SemanticQueryResponse}})
+async def semantic_search(
+    request: SemanticQueryRequest,
+    service: RecommendationService = Depends(get_recommendation_service),
+):
     """
     Search for products using semantic query
 
@@ -80,7 +88,6 @@ async def semantic_search(request: SemanticQueryRequest):
     the most relevant products based on semantic similarity.
     """
     try:
-        service = RecommendationService()
         result = await service.get_semantic_recommendations(
             query=request.query,
             limit=request.limit,
@@ -91,7 +98,7 @@ async def semantic_search(request: SemanticQueryRequest):
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["message"])
 
-        return SemanticQueryResponse(**result)
+        return result
 
     except HTTPException:
         raise
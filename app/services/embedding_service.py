@@ -1,57 +1,211 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, Batch
-from typing import List, Dict, Optional
+import asyncio
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    Distance,
+    VectorParams,
+    PointStruct,
+    OptimizersConfigDiff,
+    PayloadSchemaType,
+    HnswConfigDiff,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+)
+from typing import AsyncIterator, List, Dict, Optional
 import logging
 from app.config import settings
+from app.database import get_qdrant_client
 from app.models.product import ProductForEmbedding
 from app.utils.logging import logger
 from fastembed import TextEmbedding
 
 import google.generativeai as genai
 
+# Inputs at least this large are embedded with one worker process per core
+EMBED_PARALLEL_THRESHOLD = 1000
+# Points per embedding/upsert chunk and how many upserts may be in flight
+UPSERT_CHUNK_SIZE = 256
+UPSERT_CONCURRENCY = 8
+# Initial catalog loads via upload_collection
+BULK_UPLOAD_BATCH_SIZE = 1024
+BULK_UPLOAD_PARALLEL = 8
+# Rows embedded at a time during a bulk load; kept under
+# EMBED_PARALLEL_THRESHOLD so no chunk restarts the embedding workers
+BULK_LOAD_CHUNK_SIZE = 512
+# Qdrant's default, used when a collection reports no indexing threshold
+DEFAULT_INDEXING_THRESHOLD = 20000
+# Payload fields used in query filters, indexed as keywords
+PAYLOAD_INDEX_FIELDS = ("category", "brand", "type", "product_id")
+
+
+@lru_cache(maxsize=None)
+def get_model() -> TextEmbedding:
+    """
+    Process-wide FastEmbed model. Every EmbeddingService shares one ONNX
+    session instead of loading its own copy of the weights.
+    """
+    # Without CUDA only the CPU provider is requested, so CPU-only hosts
+    # never pay the CUDA provider initialisation cost
+    providers = (
+        ["CUDAExecutionProvider", "CPUExecutionProvider"]
+        if settings.EMBED_USE_CUDA
+        else ["CPUExecutionProvider"]
+    )
+    return TextEmbedding(
+        model_name=settings.MODEL_NAME,
+        cache_dir=".cache",
+        # None lets ONNX Runtime use one intra-op thread per physical core
+        threads=settings.EMBED_THREADS or None,
+        providers=providers,
+    )
+
+
+class _EmbedCache:
+    """
+    Thread-safe LRU of text -> embedding, keyed by a 16-byte blake2b digest
+    so long product texts are not kept alive as dict keys.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self._entries: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+            return vector
+
+    def put(self, key: bytes, vector: np.ndarray):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
 
 class EmbeddingService:
-    def __init__(self):
-        self.client = QdrantClient(settings.QDRANT_URL, port=settings.QDRANT_PORT)
+    def __init__(self, client: Optional[AsyncQdrantClient] = None):
+        self.client = client or get_qdrant_client()
         self.model_name = settings.MODEL_NAME
         # self.client.set_model(settings.MODEL_NAME)
         self.collection_name = settings.COLLECTION_NAME
-        self.embedding_model = TextEmbedding(
-            model_name=self.model_name, cache_dir=".cache"
-        )
+        self.embedding_model = get_model()
+        self._cache = _EmbedCache(settings.EMBED_CACHE_SIZE)
+        self._collection_ready = False
         logger.info(f"Initialized EmbeddingService with model: {self.model_name}")
         # genai.configure(api_key="")
 
     async def ensure_collection_exists(self):
         """Ensure collection exists, create if not"""
+        # Once confirmed, later calls (every sync) skip the Qdrant round-trips
+        if self._collection_ready:
+            return True
         try:
-            if not self.client.collection_exists(collection_name=self.collection_name):
-                self.client.create_collection(
+            if not await self.client.collection_exists(
+                collection_name=self.collection_name
+            ):
+                await self.client.create_collection(
                     collection_name=self.collection_name,
+                    # Originals live on disk and are only read for rescoring;
+                    # HNSW traversal uses the int8 copies kept in RAM
                     vectors_config=VectorParams(
                         size=self.client.get_embedding_size(self.model_name),
                         distance=Distance.COSINE,
+                        on_disk=True,
+                    ),
+                    quantization_config=ScalarQuantization(
+                        scalar=ScalarQuantizationConfig(
+                            type=ScalarType.INT8, quantile=0.99, always_ram=True
+                        )
                     ),
+                    hnsw_config=HnswConfigDiff(m=16, ef_construct=128),
                 )
                 logger.info(f"Created Collection : {self.collection_name}")
-                return True
+            else:
+                logger.info(f"Collection {self.collection_name} already exists")
 
-            logger.info(f"Collection {self.collection_name} already exists")
+            # Filtered queries use these indexes instead of post-filtering HNSW
+            # hits; creating an index that already exists is a no-op
+            for field in PAYLOAD_INDEX_FIELDS:
+                await self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field,
+                    field_schema=PayloadSchemaType.KEYWORD,
+                )
+            self._collection_ready = True
             return True
         except Exception as e:
             logger.error(f"Error ensuring collection exists: {e}")
             return False
 
-    def get_embeddings(self, documents: List[str]) -> List[List[float]]:
+    def get_embeddings(self, documents: List[str]) -> np.ndarray:
         """
         Generate vector embeddings using fastembed.TextEmbedding
+        Documents seen recently are served from the in-process cache; only the
+        rest go through the model, each distinct text once.
+        Returns an (N, dim) float32 array of L2-normalised rows; empty on failure.
         """
         try:
-            # embed() returns a generator
-            return list(self.embedding_model.embed(documents))
+            if not documents:
+                return np.empty((0, 0), dtype=np.float32)
+
+            keys = [self._cache.key(doc) for doc in documents]
+            vectors = [self._cache.get(key) for key in keys]
+            missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+            if missing:
+                # Identical texts (variant SKUs, shared descriptions) are
+                # embedded once and fanned back out to every position
+                unique: Dict[bytes, List[int]] = {}
+                for i in missing:
+                    unique.setdefault(keys[i], []).append(i)
+
+                # embed() returns a generator; encode in real batches and fan
+                # out to worker processes only when the input is large enough
+                # to pay for spawning them
+                parallel = 0 if len(unique) >= EMBED_PARALLEL_THRESHOLD else None
+                fresh = self.embedding_model.embed(
+                    [documents[positions[0]] for positions in unique.values()],
+                    batch_size=settings.EMBED_BATCH_SIZE,
+                    parallel=parallel,
+                )
+                for (key, positions), vector in zip(unique.items(), fresh):
+                    self._cache.put(key, vector)
+                    for i in positions:
+                        vectors[i] = vector
+
+            # One contiguous float32 block instead of N boxed Python lists
+            embeddings = np.ascontiguousarray(np.stack(vectors), dtype=np.float32)
+            # Unit-length rows regardless of whether the model normalises;
+            # stack() copied the rows, so the cached vectors are untouched
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+            return embeddings
         except Exception as e:
             logger.error(f"Embedding generation failed: {e}")
-            return []
+            return np.empty((0, 0), dtype=np.float32)
+
+    def get_query_embedding(self, text: str) -> np.ndarray:
+        """Embed a single search query, reusing cached vectors for repeated queries"""
+        vectors = self.get_embeddings([text])
+        if not len(vectors):
+            raise ValueError("Query embedding failed")
+        return vectors[0]
 
     # TODO: This was just for experimentation and is not called elsewhere
     def get_embeddings_gemini(self, documents: list[str]) -> list[list[float]]:
@@ -73,11 +227,33 @@ class EmbeddingService:
             logger.error(f"Embedding generation failed with Google Gemini API: {e}")
             raise
 
+    @staticmethod
+    def _to_payload(product: ProductForEmbedding) -> Dict:
+        """Payload stored alongside each product vector in Qdrant"""
+        return {
+            "product_id": str(product.product_id),
+            "name": product.name,
+            "category": product.category,
+            "brand": product.brand,
+            "type": product.type,
+            "description": product.description,
+        }
+
     async def add_products_to_vector_db(
-        self, products: List["ProductForEmbedding"]
+        self,
+        products: List["ProductForEmbedding"],
+        wait: bool = True,
+        vectors: Optional[np.ndarray] = None,
     ) -> tuple[List[str], List[str]]:
         """
-        Upsert products into Qdrant using batch operation.
+        Upsert products into Qdrant in fixed-size chunks.
+        Embedding (CPU, in a worker thread) and upserts (network) run as a
+        producer/consumer pipeline so one chunk is embedded while earlier
+        chunks are in flight.
+        vectors, when given, are precomputed embeddings aligned with products
+        and the model is skipped.
+        With wait=False the upsert is only acknowledged, not applied; call
+        flush() before relying on the points being persisted.
         Returns: (successful_ids, failed_ids)
         """
         successful_ids = []
@@ -86,53 +262,165 @@ class EmbeddingService:
         if not products:
             return successful_ids, failed_ids
 
-        try:
-            documents = []
-            payloads = []
-            ids = []
+        # Bounded so embedding cannot run arbitrarily far ahead of the upserts
+        queue: asyncio.Queue = asyncio.Queue(maxsize=4)
 
-            for product in products:
+        async def produce():
+            try:
+                for start in range(0, len(products), UPSERT_CHUNK_SIZE):
+                    documents = []
+                    prepared = []
+                    positions = []
+
+                    for position in range(
+                        start, min(start + UPSERT_CHUNK_SIZE, len(products))
+                    ):
+                        product = products[position]
+                        try:
+                            if vectors is None:
+                                documents.append(product.to_text())
+                            prepared.append(product)
+                            positions.append(position)
+                        except Exception as e:
+                            logger.error(
+                                f"Error preparing product {product.product_id}: {e}"
+                            )
+                            failed_ids.append(str(product.product_id))
+
+                    if not prepared:
+                        continue
+
+                    if vectors is None:
+                        chunk_vectors = await asyncio.to_thread(
+                            self.get_embeddings, documents
+                        )
+                    else:
+                        chunk_vectors = vectors[positions]
+                    if len(chunk_vectors) != len(prepared):
+                        logger.error("Failed to generate the embeddings for chunk")
+                        failed_ids.extend(str(p.product_id) for p in prepared)
+                        continue
+
+                    # Points are built per chunk, so only one chunk's payloads
+                    # exist at a time; tolist() converts the float32 block in
+                    # one C-level pass
+                    points = [
+                        PointStruct(
+                            id=str(product.product_id),
+                            vector=vector,
+                            payload=self._to_payload(product),
+                        )
+                        for product, vector in zip(prepared, chunk_vectors.tolist())
+                    ]
+                    await queue.put(points)
+            finally:
+                for _ in range(UPSERT_CONCURRENCY):
+                    await queue.put(None)
+
+        async def consume():
+            # Several consumers keep up to UPSERT_CONCURRENCY upserts in flight;
+            # one oversized request times out or stalls the server
+            while (points := await queue.get()) is not None:
+                ids = [point.id for point in points]
                 try:
-                    doc_text = product.to_text()
-                    documents.append(doc_text)
-                    payloads.append(
-                        {
-                            "product_id": product.product_id,
-                            "name": product.name,
-                            "category": product.category,
-                            "brand": product.brand,
-                            "type": product.type,
-                            "description": product.description,
-                        }
+                    await self.client.upsert(
+                        collection_name=self.collection_name,
+                        points=points,
+                        wait=wait,
                     )
-                    ids.append(str(product.product_id))
+                    successful_ids.extend(ids)
                 except Exception as e:
-                    logger.error(f"Error preparing product {product.product_id}: {e}")
-                    failed_ids.append(product.product_id)
+                    logger.error(f"Error during Qdrant upsert: {e}")
+                    failed_ids.extend(ids)
 
-            # Generate embeddings using fastembed
-            try:
-                vectors = self.get_embeddings(documents)
+        try:
+            await asyncio.gather(
+                produce(), *(consume() for _ in range(UPSERT_CONCURRENCY))
+            )
+        except Exception as e:
+            logger.error(f"Error adding products to vector DB: {e}")
+            accounted = set(successful_ids) | set(failed_ids)
+            failed_ids.extend(
+                pid
+                for pid in (str(p.product_id) for p in products)
+                if pid not in accounted
+            )
+
+        logger.info(f"Successfully upserted {len(successful_ids)} products to Qdrant")
+        return successful_ids, failed_ids
+
+    async def bulk_load_products(
+        self, batches: AsyncIterator[List[ProductForEmbedding]]
+    ) -> tuple[List[str], List[str]]:
+        """
+        Initial catalog load. Pauses HNSW indexing and streams the batches
+        through qdrant-client's parallel upload workers, embedding each batch
+        as the upload reaches it, then restores indexing so the graph is built
+        once at the end. Only one batch of vectors is held in memory at a time.
+        Use add_products_to_vector_db for incremental updates.
+        Returns: (successful_ids, failed_ids)
+        """
+        first = await anext(batches, None)
+        if not first:
+            return [], []
+
+        loop = asyncio.get_running_loop()
+        ids = []
+
+        def rows():
+            # Runs in the upload thread; batches are read back on the event loop
+            batch = first
+            while batch is not None:
+                vectors = self.get_embeddings([product.to_text() for product in batch])
+                if len(vectors) != len(batch):
+                    raise ValueError("Embedding generation failed")
+                for product, vector in zip(batch, vectors):
+                    ids.append(str(product.product_id))
+                    yield ids[-1], vector.tolist(), self._to_payload(product)
+                batch = asyncio.run_coroutine_threadsafe(
+                    anext(batches, None), loop
+                ).result()
 
-            except Exception as e:
-                logger.error("Failed to generate the embeddings : " + e)
+        try:
+            # Restore whatever threshold the collection had, not Qdrant's default
+            info = await self.client.get_collection(self.collection_name)
+            indexing_threshold = info.config.optimizer_config.indexing_threshold
+            if indexing_threshold is None:
+                indexing_threshold = DEFAULT_INDEXING_THRESHOLD
 
-            if vectors:
-                self.client.upsert(
+            await self.client.update_collection(
+                collection_name=self.collection_name,
+                optimizers_config=OptimizersConfigDiff(indexing_threshold=0),
+            )
+            try:
+                # upload_collection reads ids, vectors and payloads in lockstep,
+                # so tee only ever buffers one upload batch
+                id_rows, vector_rows, payload_rows = itertools.tee(rows(), 3)
+                # upload_collection drives its own worker pool and blocks
+                await asyncio.to_thread(
+                    self.client.upload_collection,
                     collection_name=self.collection_name,
-                    points=Batch(ids=ids, vectors=vectors, payloads=payloads),
+                    vectors=(row[1] for row in vector_rows),
+                    payload=(row[2] for row in payload_rows),
+                    ids=(row[0] for row in id_rows),
+                    parallel=BULK_UPLOAD_PARALLEL,
+                    batch_size=BULK_UPLOAD_BATCH_SIZE,
+                    max_retries=3,
+                    wait=True,
                 )
-                successful_ids.extend([pid for pid in ids if pid not in failed_ids])
-                logger.info(
-                    f"Successfully upserted {len(successful_ids)} products to Qdrant"
+            finally:
+                await self.client.update_collection(
+                    collection_name=self.collection_name,
+                    optimizers_config=OptimizersConfigDiff(
+                        indexing_threshold=indexing_threshold
+                    ),
                 )
-        except Exception as e:
-            logger.error(f"Error during Qdrant upsert: {e}")
-            failed_ids.extend(
-                [p.product_id for p in products if p.product_id not in failed_ids]
-            )
 
-        return successful_ids, failed_ids
+            logger.info(f"Bulk loaded {len(ids)} products to Qdrant")
+            return ids, []
+        except Exception as e:
+            logger.error(f"Error during bulk load: {e}")
+            return [], ids
 
     async def add_products_to_vector_db_old(
         self, products: List[ProductForEmbedding]
@@ -156,29 +444,15 @@ class EmbeddingService:
             for product in products:
                 try:
                     documents.append(product.to_text())
-                    metadata.append(
-                        {
-                            "product_id": product.product_id,
-                            "name": product.name,
-                            "category": product.category,
-                            "brand": product.brand,
-                            "type": product.type,
-                            "description": product.description,
-                        }
-                    )
-                    ids.append(product.product_id)
-                    # Convert to int if possible, otherwise use string
-                    # try:
-                    #     ids.append(int(product.product_id))
-                    # except ValueError:
-                    #     ids.append(product.product_id)
+                    metadata.append(self._to_payload(product))
+                    ids.append(str(product.product_id))
                 except Exception as e:
                     logger.error(f"Error preparing product {product.product_id}: {e}")
                     failed_ids.append(product.product_id)
 
             # Upload to Qdrant
             if documents:
-                self.client.add(
+                await self.client.add(
                     collection_name=self.collection_name,
                     documents=documents,
                     metadata=metadata,
@@ -186,8 +460,9 @@ class EmbeddingService:
                 )
 
                 # All successful if no exception
+                failed_set = set(failed_ids)
                 successful_ids.extend(
-                    [p.product_id for p in products if p.product_id not in failed_ids]
+                    [p.product_id for p in products if p.product_id not in failed_set]
                 )
 
                 logger.info(
@@ -197,16 +472,27 @@ class EmbeddingService:
         except Exception as e:
             logger.error(f"Error adding products to vector DB: {e}")
             # Mark all as failed
+            failed_set = set(failed_ids)
             failed_ids.extend(
-                [p.product_id for p in products if p.product_id not in failed_ids]
+                [p.product_id for p in products if p.product_id not in failed_set]
             )
 
         return successful_ids, failed_ids
 
+    async def flush(self):
+        """
+        Wait until all previously acknowledged (wait=False) updates are applied.
+        Qdrant applies updates in order, so an empty wait=True upsert returns
+        only once everything queued before it has been processed.
+        """
+        await self.client.upsert(
+            collection_name=self.collection_name, points=[], wait=True
+        )
+
     async def test_connection(self) -> tuple[bool, str]:
         """Test Qdrant connection"""
         try:
-            collections = self.client.get_collections()
+            collections = await self.client.get_collections()
             return (
                 True,
                 f"Connected successfully. Found {len(collections.collections)} collections.",
@@ -217,7 +503,7 @@ class EmbeddingService:
     async def get_collection_info(self) -> Dict:
         """Get collection information"""
         try:
-            info = self.client.get_collection(self.collection_name)
+            info = await self.client.get_collection(self.collection_name)
             info_detail = info.config.params.vectors
             return {
                 "collection_name": self.collection_name,
@@ -1,47 +1,209 @@
-from pprint import pprint
+import asyncio
+import grpc
+from functools import lru_cache
 from app.config import settings
-from qdrant_client import QdrantClient, models
+from app.database import get_qdrant_client
+from qdrant_client import AsyncQdrantClient, models
+from qdrant_client.http.exceptions import UnexpectedResponse
 from app.utils.logging import logger
 from typing import Optional, List, Dict
+from uuid import UUID
 from app.models.recommendation import ProductRecommendation
-from qdrant_client.models import (
-    Document,
+from app.services.embedding_service import EmbeddingService
+
+# Only the payload fields ProductRecommendation reads are sent back
+RESULT_PAYLOAD_FIELDS = ["product_id", "name", "category", "brand", "type", "description"]
+# Search the int8 quantized vectors with 2x candidates, then rescore them
+# against the original vectors to recover recall
+SEARCH_PARAMS = models.SearchParams(
+    quantization=models.QuantizationSearchParams(rescore=True, oversampling=2.0)
 )
+# gRPC codes that blame one request in a batch rather than the server
+REQUEST_ERROR_CODES = {grpc.StatusCode.INVALID_ARGUMENT, grpc.StatusCode.NOT_FOUND}
+
+
+def _is_request_error(error: Exception) -> bool:
+    """Whether a failed batch call was caused by a request, not by Qdrant"""
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code is not None and 400 <= error.status_code < 500
+    if isinstance(error, grpc.aio.AioRpcError):
+        return error.code() in REQUEST_ERROR_CODES
+    return False
+
+
+class _BatchScheduler:
+    """
+    Coalesces concurrent queries into query_batch_points calls.
+    Callers submit a QueryRequest and await its QueryResponse; a background
+    task collects up to max_batch requests or waits at most flush_ms after
+    the first one, then sends them as one RPC.
+    """
+
+    def __init__(
+        self,
+        client: AsyncQdrantClient,
+        collection_name: str,
+        max_batch: int = 32,
+        flush_ms: float = 10,
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self.max_batch = max_batch
+        self.flush_seconds = flush_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: set[asyncio.Task] = set()
+
+    async def submit(self, request: models.QueryRequest) -> models.QueryResponse:
+        if self._task is None:
+            # Created lazily so the queue and task belong to the serving loop
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_seconds
+            try:
+                while len(batch) < self.max_batch:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(
+                            await asyncio.wait_for(self._queue.get(), remaining)
+                        )
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Shutting down mid-collection; don't leave these callers waiting
+                self._fail(batch)
+                raise
+            # Dispatch without blocking collection of the next batch
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: list):
+        try:
+            try:
+                responses = await self.client.query_batch_points(
+                    collection_name=self.collection_name,
+                    requests=[request for request, _ in batch],
+                )
+            except Exception as e:
+                if len(batch) > 1 and _is_request_error(e):
+                    # One bad request (e.g. an unknown product id) rejects the whole
+                    # call; retry each on its own so the others still succeed
+                    await asyncio.gather(*(self._dispatch([item]) for item in batch))
+                    return
+                # Qdrant itself failed (unavailable, timeout, ...); retrying each
+                # request would only multiply the load, so fail them all
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        except asyncio.CancelledError:
+            self._fail(batch)
+            raise
+        for (_, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        # Dispatches still in flight fail their callers on cancellation
+        for task in list(self._inflight):
+            task.cancel()
+        await asyncio.gather(*self._inflight, return_exceptions=True)
+        # Requests queued but never dispatched
+        while self._queue is not None and not self._queue.empty():
+            self._fail([self._queue.get_nowait()])
+
+    @staticmethod
+    def _fail(batch: list):
+        """Resolve pending callers with an error instead of leaving them waiting"""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(RuntimeError("Query scheduler is closed"))
 
 
 class RecommendationService:
-    def __init__(self):
+    def __init__(
+        self,
+        embedding_service: Optional[EmbeddingService] = None,
+        client: Optional[AsyncQdrantClient] = None,
+    ):
         self.collection_name = settings.COLLECTION_NAME
         self.model_name = settings.MODEL_NAME
-        self.client = QdrantClient(settings.QDRANT_URL, port=settings.QDRANT_PORT)
+        self.client = client or get_qdrant_client()
+        # Query vectors are computed locally (and cached) instead of per request
+        self.embedder = embedding_service or EmbeddingService(self.client)
+
+        self._scheduler = _BatchScheduler(
+            self.client,
+            self.collection_name,
+            max_batch=settings.QUERY_BATCH_MAX,
+            flush_ms=settings.QUERY_BATCH_FLUSH_MS,
+        )
 
         logger.info(
             f"Initialized Qdrant client with collection: {self.collection_name} with model {self.model_name}"
         )
 
-    def _build_query_filter(self, category_filter: Optional[str] = None,
-        brand_filter: Optional[str] = None):
-            # Build query filter
-        try:
-            query_filter = None
-            must_conditions = []
+    async def close(self):
+        """Stop the query batcher; the shared Qdrant client is closed by its owner"""
+        await self._scheduler.close()
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _build_query_filter(
+        category_filter: Optional[str] = None, brand_filter: Optional[str] = None
+    ) -> Optional[models.Filter]:
+        """
+        Build the payload filter for a category/brand combination.
+        Combinations repeat heavily across requests, so built filters are cached;
+        callers must treat the returned Filter as read-only.
+        """
+        must_conditions = []
 
-            if category_filter:
-                must_conditions.append(
-                    {"key": "category", "match": {"value": category_filter}}
+        if category_filter:
+            must_conditions.append(
+                models.FieldCondition(
+                    key="category", match=models.MatchValue(value=category_filter)
                 )
-            if brand_filter:
-                must_conditions.append(
-                    {"key": "brand", "match": {"value": brand_filter}}
+            )
+        if brand_filter:
+            must_conditions.append(
+                models.FieldCondition(
+                    key="brand", match=models.MatchValue(value=brand_filter)
                 )
+            )
 
-            if must_conditions:
-                query_filter = {"must": must_conditions}
-
-            return query_filter
+        return models.Filter(must=must_conditions) if must_conditions else None
 
-        except Exception as e:
-            logger.error("Error buiding query filter")
+    @staticmethod
+    def _to_recommendation(point) -> ProductRecommendation:
+        """
+        Build a ProductRecommendation from a scored point without re-validating.
+        Payloads are written by our own sync, so their shape is already known.
+        """
+        payload = point.payload
+        return ProductRecommendation.model_construct(
+            product_id=UUID(payload["product_id"]),
+            name=payload["name"],
+            category=payload["category"],
+            brand=payload["brand"],
+            type=payload["type"],
+            description=payload["description"],
+            similarity_score=float(point.score) if point.score is not None else 0.0,
+        )
 
     async def get_similar_products_by_id(
         self,
@@ -59,11 +221,15 @@ class RecommendationService:
             query_filter = self._build_query_filter(category_filter=category_filter, brand_filter=brand_filter)
 
             # Query vector database directly using product ID
-            similar_results = self.client.query_points(
-                collection_name=self.collection_name,
-                query=query_id,
-                limit=limit,
-                query_filter=query_filter,
+            similar_results = await self._scheduler.submit(
+                models.QueryRequest(
+                    query=query_id,
+                    limit=limit,
+                    filter=query_filter,
+                    with_payload=RESULT_PAYLOAD_FIELDS,
+                    with_vector=False,
+                    params=SEARCH_PARAMS,
+                )
             )
 
             # similar_results = self.client.recommend(
@@ -75,23 +241,10 @@ class RecommendationService:
             #     with_vectors=False,  # We don't need the vectors back
             # )
 
-            # pprint(similar_results)
-
             # Format similar products
-            similar_products = []
-            for result in similar_results.points:
-                recommendation = ProductRecommendation(
-                    product_id=result.payload["product_id"],
-                    name=result.payload["name"],
-                    category=result.payload["category"],
-                    brand=result.payload["brand"],
-                    type=result.payload["type"],
-                    description=result.payload["description"],
-                    similarity_score=(
-                        float(result.score) if hasattr(result, "score") else 0.0
-                    ),
-                )
-                similar_products.append(recommendation)
+            similar_products = [
+                self._to_recommendation(result) for result in similar_results.points
+            ]
 
             return {
                 "success": True,
@@ -127,33 +280,25 @@ class RecommendationService:
 
             query_filter = self._build_query_filter(category_filter=category_filter, brand_filter=brand_filter)
 
-            # Query vector database directly using product ID
-            similar_results = self.client.recommend(
-                collection_name=self.collection_name,
-                positive=query_ids,
-                limit=limit,
-                query_filter=query_filter,
-                with_payload=True,
-                with_vectors=False
+            # One round-trip for the whole list: Qdrant combines the stored
+            # vectors of all ids server-side and excludes the ids themselves
+            similar_results = await self._scheduler.submit(
+                models.QueryRequest(
+                    query=models.RecommendQuery(
+                        recommend=models.RecommendInput(positive=query_ids)
+                    ),
+                    limit=limit,
+                    filter=query_filter,
+                    with_payload=RESULT_PAYLOAD_FIELDS,
+                    with_vector=False,
+                    params=SEARCH_PARAMS,
+                )
             )
 
-            # pprint(similar_results)
-
             # Format similar products
-            similar_products = []
-            for result in similar_results:
-                recommendation = ProductRecommendation(
-                    product_id=result.payload["product_id"],
-                    name=result.payload["name"],
-                    category=result.payload["category"],
-                    brand=result.payload["brand"],
-                    type=result.payload["type"],
-                    description=result.payload["description"],
-                    similarity_score=(
-                        float(result.score) if hasattr(result, "score") else 0.0
-                    ),
-                )
-                similar_products.append(recommendation)
+            similar_products = [
+                self._to_recommendation(result) for result in similar_results.points
+            ]
 
             return {
                 "success": True,
@@ -188,26 +333,27 @@ class RecommendationService:
             # Build query filter
             query_filter = self._build_query_filter(category_filter=category_filter, brand_filter=brand_filter)
 
-            search_results = self.client.query_points(
-                collection_name=self.collection_name,
-                query=Document(text=query, model=self.model_name),
-                limit=limit,
-                query_filter=query_filter,
+            query_vector = await asyncio.to_thread(
+                self.embedder.get_query_embedding, query
+            )
+
+            search_results = (
+                await self._scheduler.submit(
+                    models.QueryRequest(
+                        query=query_vector.tolist(),
+                        limit=limit,
+                        filter=query_filter,
+                        with_payload=RESULT_PAYLOAD_FIELDS,
+                        with_vector=False,
+                        params=SEARCH_PARAMS,
+                    )
+                )
             ).points
 
             # Format results
-            recommendations = []
-            for result in search_results:
-                recommendation = ProductRecommendation(
-                    product_id=result.payload["product_id"],
-                    name=result.payload["name"],
-                    category=result.payload["category"],
-                    brand=result.payload["brand"],
-                    type=result.payload["type"],
-                    description=result.payload["description"],
-                    similarity_score=float(result.score),
-                )
-                recommendations.append(recommendation)
+            recommendations = [
+                self._to_recommendation(result) for result in search_results
+            ]
 
             return {
                 "success": True,
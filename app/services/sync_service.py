@@ -1,28 +1,64 @@
 import asyncio
+import asyncpg
+import hashlib
+import time
 import uuid
-from datetime import datetime
-from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional, Tuple
 import logging
+import numpy as np
+from app.config import settings
 from app.database import db_manager
-from app.services.embedding_service import EmbeddingService
+from app.services.embedding_service import BULK_LOAD_CHUNK_SIZE, EmbeddingService
 from app.models.product import Product, ProductForEmbedding, ProductUpdate
 from app.models.sync import SyncStatus, SyncResponse
 from app.utils.logging import logger
 
+# Above this many ids the indexed-status update goes through COPY + a join
+STATUS_UPDATE_COPY_THRESHOLD = 10000
+# Error messages returned in a SyncResponse; failure counts are not capped
+MAX_REPORTED_ERRORS = 10
+# Hot statements are kept as constants so every call sends identical SQL text
+# and hits asyncpg's per-connection prepared statement cache
+UPDATE_SYNC_STATUS_SQL = """
+UPDATE products_new
+SET qdrant_indexed = $1, qdrant_indexed_at = $2
+WHERE product_id = ANY($3::text[])
+"""
+INSERT_SYNC_HISTORY_SQL = """
+INSERT INTO sync_history
+(sync_id, started_at, completed_at, duration_seconds,
+ total_products, processed_products, failed_products, status)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+"""
+
 
 class SyncService:
-    def __init__(self):
-        self.embedding_service = EmbeddingService()
+    def __init__(self, embedding_service: Optional[EmbeddingService] = None):
+        self.embedding_service = embedding_service or EmbeddingService()
+        self._embedding_cache_ready = False
+        self._history_ready = False
+        # Concurrent CREATE TABLE IF NOT EXISTS can still collide in Postgres
+        self._ddl_lock = asyncio.Lock()
 
     async def sync_products(
-        self, batch_size: int = 100, force_reindex: bool = False
+        self,
+        batch_size: int = settings.SYNC_BATCH_SIZE,
+        force_reindex: bool = False,
+        max_products: Optional[int] = None,
     ) -> SyncResponse:
         """Main sync function"""
         sync_id = str(uuid.uuid4())
         started_at = datetime.now()
+        # Durations come from the monotonic clock; completed_at is derived
+        t0 = time.perf_counter()
 
         logger.info(
-            f"Starting sync {sync_id} with batch_size={batch_size}, force_reindex={force_reindex}"
+            "Starting sync %s with batch_size=%d, parallel_requests=%d, force_reindex=%s",
+            sync_id,
+            batch_size,
+            settings.SYNC_PARALLEL_REQUESTS,
+            force_reindex,
         )
 
         try:
@@ -41,12 +77,94 @@ class SyncService:
                     errors=["Collection creation failed"],
                 )
 
-            # Get products to sync
-            products_to_sync = await self.get_products_to_sync(force_reindex)
-            total_products = len(products_to_sync)
+            # Three overlapping stages joined by bounded queues: stream row
+            # batches from PostgreSQL, validate + embed them, upsert them to
+            # Qdrant. maxsize applies backpressure so a fast stage cannot run
+            # arbitrarily far ahead of a slow one.
+            total_products = 0
+            processed_products = 0
+            failed_products = 0
+            errors = []
+            # Upserted without waiting; marked indexed only after flush()
+            pending_ids = []
+            workers = settings.SYNC_PARALLEL_REQUESTS
+            fetch_queue: asyncio.Queue = asyncio.Queue(maxsize=4)
+            upsert_queue: asyncio.Queue = asyncio.Queue(maxsize=4)
+            # (batch, (successful_ids, failed_ids) or the exception it raised)
+            outcomes = []
+
+            async def fetch_stage():
+                nonlocal total_products
+                try:
+                    batch_number = 0
+                    async for batch in self.iter_products_to_sync(
+                        batch_size, force_reindex, max_products
+                    ):
+                        total_products += len(batch)
+                        batch_number += 1
+                        await fetch_queue.put((batch_number, batch))
+                finally:
+                    for _ in range(workers):
+                        await fetch_queue.put(None)
+
+            async def embed_worker():
+                while (item := await fetch_queue.get()) is not None:
+                    batch_number, batch = item
+                    try:
+                        batch_products = self.validate_batch(batch)
+                        vectors = await self.get_batch_embeddings(batch_products)
+                    except Exception as e:
+                        outcomes.append((batch, e))
+                        continue
+                    await upsert_queue.put(
+                        (batch_number, batch, batch_products, vectors)
+                    )
+
+            async def embed_stage():
+                try:
+                    await asyncio.gather(*(embed_worker() for _ in range(workers)))
+                finally:
+                    # Always release the upsert workers, even if an embed
+                    # worker died, or the gather below never returns
+                    for _ in range(workers):
+                        await upsert_queue.put(None)
+
+            async def upsert_worker():
+                while (item := await upsert_queue.get()) is not None:
+                    batch_number, batch, batch_products, vectors = item
+                    try:
+                        successful_ids, failed_ids = (
+                            await self.embedding_service.add_products_to_vector_db(
+                                batch_products, wait=False, vectors=vectors
+                            )
+                        )
+                    except Exception as e:
+                        outcomes.append((batch, e))
+                        continue
+                    logger.info(
+                        "Processed batch %d: %d success, %d failed",
+                        batch_number,
+                        len(successful_ids),
+                        len(failed_ids),
+                    )
+                    outcomes.append((batch, (successful_ids, failed_ids)))
+
+            # Let every stage drain before surfacing an error; a stage that
+            # died may have dropped batches, so the run cannot be reported
+            stage_results = await asyncio.gather(
+                fetch_stage(),
+                embed_stage(),
+                *(upsert_worker() for _ in range(workers)),
+                return_exceptions=True,
+            )
+            stage_errors = [r for r in stage_results if isinstance(r, BaseException)]
+            for error in stage_errors:
+                logger.error("Sync %s pipeline stage failed: %r", sync_id, error)
+            if stage_errors:
+                raise stage_errors[0]
 
             if total_products == 0:
-                completed_at = datetime.now()
+                duration = time.perf_counter() - t0
                 return SyncResponse(
                     success=True,
                     message="No products to sync",
@@ -57,65 +175,84 @@ class SyncService:
                     failed_products=0,
                     batch_size=batch_size,
                     started_at=started_at,
-                    completed_at=completed_at,
-                    duration_seconds=(completed_at - started_at).total_seconds(),
+                    completed_at=started_at + timedelta(seconds=duration),
+                    duration_seconds=duration,
                 )
 
-            # Process in batches
-            processed_products = 0
-            failed_products = 0
-            errors = []
-
-            for i in range(0, total_products, batch_size):
-                batch = products_to_sync[i : i + batch_size]
-                batch_products = [ProductForEmbedding(**product) for product in batch]
+            logger.info("Found %d products to sync", total_products)
 
-                try:
-                    # Add to vector database
-                    successful_ids, failed_ids = (
-                        await self.embedding_service.add_products_to_vector_db(
-                            batch_products
-                        )
+            for batch, result in outcomes:
+                if isinstance(result, Exception):
+                    # Mark entire batch as failed
+                    failed_products += len(batch)
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append(f"Batch processing failed: {str(result)}")
+                    logger.error("Batch processing failed: %s", result)
+                    continue
+
+                successful_ids, failed_ids = result
+                pending_ids.extend(successful_ids)
+
+                # Handle failed products
+                if failed_ids:
+                    failed_products += len(failed_ids)
+                    # Only the reported messages are built; the count stays exact
+                    remaining = max(0, MAX_REPORTED_ERRORS - len(errors))
+                    errors.extend(
+                        f"Failed to process product {pid}"
+                        for pid in failed_ids[:remaining]
                     )
-
-                    # Update database for successful products
-                    if successful_ids:
-                        await self.update_products_sync_status(successful_ids, True)
-                        processed_products += len(successful_ids)
-
-                    # Handle failed products
-                    if failed_ids:
-                        failed_products += len(failed_ids)
-                        errors.extend(
-                            [f"Failed to process product {pid}" for pid in failed_ids]
-                        )
-                        logger.error(
-                            f"Failed to process {len(failed_ids)} products in batch"
-                        )
-
-                    logger.info(
-                        f"Processed batch {i//batch_size + 1}: {len(successful_ids)} success, {len(failed_ids)} failed"
+                    logger.error(
+                        "Failed to process %d products in batch", len(failed_ids)
                     )
 
+            # Wait for Qdrant to apply the queued upserts, then mark them in
+            # PostgreSQL. If the flush fails the products stay unindexed and
+            # are picked up again by the next sync.
+            flushed = False
+            if pending_ids:
+                try:
+                    await self.embedding_service.flush()
+                    flushed = True
                 except Exception as e:
-                    # Mark entire batch as failed
-                    batch_failed = len(batch)
-                    failed_products += batch_failed
-                    errors.append(f"Batch processing failed: {str(e)}")
-                    logger.error(f"Batch processing failed: {e}")
+                    failed_products += len(pending_ids)
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append(f"Finalizing upserts failed: {str(e)}")
+                    logger.error("Finalizing upserts failed: %s", e)
+
+            # The status update and the history record share one pooled
+            # connection, acquired only for these two writes
+            marked = False
+            duration = None
+            try:
+                async with db_manager.get_connection() as conn:
+                    if flushed:
+                        await self.update_products_sync_status(pending_ids, True, conn)
+                        processed_products += len(pending_ids)
+                        marked = True
+
+                    # Record sync completion
+                    duration = time.perf_counter() - t0
+                    await self.record_sync_completion(
+                        sync_id,
+                        started_at,
+                        started_at + timedelta(seconds=duration),
+                        total_products,
+                        processed_products,
+                        failed_products,
+                        duration,
+                        conn=conn,
+                    )
+            except Exception as e:
+                if flushed and not marked:
+                    failed_products += len(pending_ids)
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append(f"Finalizing upserts failed: {str(e)}")
+                logger.error("Finalizing sync failed: %s", e)
 
-            # Record sync completion
-            completed_at = datetime.now()
-            duration = (completed_at - started_at).total_seconds()
-
-            await self.record_sync_completion(
-                sync_id,
-                started_at,
-                completed_at,
-                total_products,
-                processed_products,
-                failed_products,
-            )
+            if duration is None:
+                duration = time.perf_counter() - t0
+            completed_at = started_at + timedelta(seconds=duration)
 
             # Determine final status
             if failed_products == 0:
@@ -143,12 +280,12 @@ class SyncService:
                 started_at=started_at,
                 completed_at=completed_at,
                 duration_seconds=duration,
-                errors=errors[:10],  # Limit errors in response
+                errors=errors,  # Capped at MAX_REPORTED_ERRORS
             )
 
         except Exception as e:
-            logger.error(f"Sync {sync_id} failed with error: {e}")
-            completed_at = datetime.now()
+            logger.error("Sync %s failed with error: %s", sync_id, e)
+            duration = time.perf_counter() - t0
             return SyncResponse(
                 success=False,
                 message=f"Sync failed: {str(e)}",
@@ -159,72 +296,312 @@ class SyncService:
                 failed_products=0,
                 batch_size=batch_size,
                 started_at=started_at,
-                completed_at=completed_at,
-                duration_seconds=(completed_at - started_at).total_seconds(),
+                completed_at=started_at + timedelta(seconds=duration),
+                duration_seconds=duration,
                 errors=[str(e)],
             )
 
-    async def get_products_to_sync(self, force_reindex: bool = False) -> List[dict]:
-        """Get products that need to be synced"""
+    async def initial_load(self) -> SyncResponse:
+        """
+        Load the whole catalog into a fresh collection via bulk_load_products,
+        which pauses HNSW indexing for the upload. Rows are streamed from the
+        cursor and embedded chunk by chunk as the upload consumes them.
+        Use sync_products for incremental updates.
+        """
+        sync_id = str(uuid.uuid4())
+        started_at = datetime.now()
+        t0 = time.perf_counter()
+        logger.info("Starting initial load %s", sync_id)
+
         try:
-            # TODO : Remove Limits
+            if not await self.embedding_service.ensure_collection_exists():
+                raise RuntimeError("Failed to ensure collection exists")
+
+            rows = self.iter_products_to_sync(BULK_LOAD_CHUNK_SIZE, force_reindex=True)
+            try:
+                successful_ids, failed_ids = (
+                    await self.embedding_service.bulk_load_products(
+                        self.validate_batch(batch) async for batch in rows
+                    )
+                )
+            finally:
+                await rows.aclose()
+            total_products = len(successful_ids) + len(failed_ids)
+            if successful_ids:
+                await self.update_products_sync_status(successful_ids, True)
+
+            duration = time.perf_counter() - t0
+            completed_at = started_at + timedelta(seconds=duration)
+            await self.record_sync_completion(
+                sync_id,
+                started_at,
+                completed_at,
+                total_products,
+                len(successful_ids),
+                len(failed_ids),
+                duration,
+            )
 
+            if not failed_ids:
+                status = SyncStatus.SUCCESS
+                message = f"Bulk loaded {len(successful_ids)} products"
+            else:
+                status = SyncStatus.FAILED
+                message = f"Bulk load failed for {len(failed_ids)} products"
+
+            return SyncResponse(
+                success=not failed_ids,
+                message=message,
+                sync_id=sync_id,
+                status=status,
+                total_products=total_products,
+                processed_products=len(successful_ids),
+                failed_products=len(failed_ids),
+                batch_size=BULK_LOAD_CHUNK_SIZE,
+                started_at=started_at,
+                completed_at=completed_at,
+                duration_seconds=duration,
+                errors=["Bulk upload failed"] if failed_ids else [],
+            )
+
+        except Exception as e:
+            logger.error("Initial load %s failed with error: %s", sync_id, e)
+            duration = time.perf_counter() - t0
+            return SyncResponse(
+                success=False,
+                message=f"Initial load failed: {str(e)}",
+                sync_id=sync_id,
+                status=SyncStatus.FAILED,
+                total_products=0,
+                processed_products=0,
+                failed_products=0,
+                batch_size=0,
+                started_at=started_at,
+                completed_at=started_at + timedelta(seconds=duration),
+                duration_seconds=duration,
+                errors=[str(e)],
+            )
+
+    async def iter_products_to_sync(
+        self,
+        batch_size: int,
+        force_reindex: bool = False,
+        max_products: Optional[int] = None,
+    ) -> AsyncIterator[List[dict]]:
+        """
+        Yield products that need to be synced, batch_size at a time, up to
+        max_products in total when given.
+        Rows are streamed through a server-side cursor, so the full result set
+        is never held in memory and the first batch starts before the last row
+        is read.
+        """
+        query = """
+        SELECT product_id, name, category, description, brand, type,
+               qdrant_indexed, qdrant_indexed_at
+        FROM products_new
+        """
+        if not force_reindex:
+            query += "WHERE qdrant_indexed = FALSE OR qdrant_indexed IS NULL\n"
+        query += "ORDER BY product_id\n"
+        args = []
+        if max_products is not None:
+            query += "LIMIT $1\n"
+            args.append(max_products)
+
+        try:
             async with db_manager.get_connection() as conn:
-                if force_reindex:
-                    query = """
-                    SELECT product_id, name, category, description, brand, type,
-                           qdrant_indexed, qdrant_indexed_at
-                    FROM products_new
-                    ORDER BY product_id
-                    LIMIT 10
-                    """
-                else:
-                    query = """
-                    SELECT product_id, name, category, description, brand, type,
-                           qdrant_indexed, qdrant_indexed_at
-                    FROM products_new
-                    WHERE qdrant_indexed = FALSE OR qdrant_indexed IS NULL
-                    ORDER BY product_id
-                    LIMIT 10
-                    """
+                # asyncpg cursors only exist inside a transaction
+                async with conn.transaction():
+                    batch = []
+                    async for row in conn.cursor(
+                        query, *args, prefetch=batch_size * 4
+                    ):
+                        batch.append(
+                            {
+                                "product_id": str(row["product_id"]),
+                                "name": row["name"],
+                                "category": row["category"],
+                                "description": row["description"],
+                                "brand": row["brand"],
+                                "type": row["type"],
+                            }
+                        )
+                        if len(batch) >= batch_size:
+                            yield batch
+                            batch = []
+                    if batch:
+                        yield batch
 
-                rows = await conn.fetch(query)
-                products = []
-                for row in rows:
-                    products.append(
-                        {
-                            "product_id": str(row["product_id"]),
-                            "name": row["name"],
-                            "category": row["category"],
-                            "description": row["description"],
-                            "brand": row["brand"],
-                            "type": row["type"],
-                        }
-                    )
+        except Exception as e:
+            logger.error("Error getting products to sync: %s", e)
+            raise
 
-                logger.info(f"Found {len(products)} products to sync")
-                return products
+    def validate_batch(self, batch: List[dict]) -> List[ProductForEmbedding]:
+        """Validate fetched rows as ProductForEmbedding"""
+        return [ProductForEmbedding(**product) for product in batch]
+
+    async def get_batch_embeddings(
+        self, products: List[ProductForEmbedding]
+    ) -> np.ndarray:
+        """
+        Embeddings for a batch, aligned with products.
+        Vectors are keyed by a SHA-256 of the embedding input text; texts
+        already in product_embedding_cache are not embedded again and each
+        distinct text in the batch is looked up once.
+        """
+        hashes = []
+        texts_by_hash = {}
+        for product in products:
+            text = product.to_text()
+            content_hash = hashlib.sha256(text.encode()).hexdigest()
+            hashes.append(content_hash)
+            texts_by_hash[content_hash] = text
+
+        vectors = await self.fetch_cached_embeddings(list(texts_by_hash))
+        missing = [h for h in texts_by_hash if h not in vectors]
+
+        if missing:
+            fresh = await asyncio.to_thread(
+                self.embedding_service.get_embeddings,
+                [texts_by_hash[h] for h in missing],
+            )
+            if len(fresh) != len(missing):
+                raise ValueError("Embedding generation failed")
+            fresh_by_hash = dict(zip(missing, fresh))
+            vectors.update(fresh_by_hash)
+            await self.store_cached_embeddings(fresh_by_hash)
+
+        logger.info(
+            "Embedding cache: %d hits, %d computed",
+            len(texts_by_hash) - len(missing),
+            len(missing),
+        )
+        return np.stack([vectors[h] for h in hashes])
+
+    async def ensure_embedding_cache_table(self, conn):
+        """Create the embedding cache table once per process"""
+        if self._embedding_cache_ready:
+            return
+        async with self._ddl_lock:
+            if self._embedding_cache_ready:
+                return
+            # Vectors are stored as raw float32 bytes, so no pgvector is needed
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS product_embedding_cache (
+                    content_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    embedding BYTEA NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (content_hash, model)
+                )
+            """
+            )
+            self._embedding_cache_ready = True
 
+    async def fetch_cached_embeddings(self, hashes: List[str]) -> dict:
+        """Cached vectors for the given content hashes; a cache failure is a miss"""
+        try:
+            async with db_manager.get_connection() as conn:
+                await self.ensure_embedding_cache_table(conn)
+                rows = await conn.fetch(
+                    """
+                    SELECT content_hash, embedding
+                    FROM product_embedding_cache
+                    WHERE model = $1 AND content_hash = ANY($2::text[])
+                """,
+                    self.embedding_service.model_name,
+                    hashes,
+                )
+                return {
+                    row["content_hash"]: np.frombuffer(row["embedding"], dtype=np.float32)
+                    for row in rows
+                }
         except Exception as e:
-            logger.error(f"Error getting products to sync: {e}")
-            return []
+            logger.error("Error reading embedding cache: %s", e)
+            return {}
 
-    async def update_products_sync_status(self, product_ids: List[str], indexed: bool):
-        """Update sync status for products"""
+    async def store_cached_embeddings(self, vectors: dict):
+        """Save freshly computed vectors; failures only cost a recomputation later"""
         try:
             async with db_manager.get_connection() as conn:
+                await self.ensure_embedding_cache_table(conn)
+                await conn.execute(
+                    """
+                    INSERT INTO product_embedding_cache (content_hash, model, embedding)
+                    SELECT content_hash, $1::text, embedding
+                    FROM unnest($2::text[], $3::bytea[]) AS t(content_hash, embedding)
+                    ON CONFLICT DO NOTHING
+                """,
+                    self.embedding_service.model_name,
+                    list(vectors),
+                    [np.asarray(v, dtype=np.float32).tobytes() for v in vectors.values()],
+                )
+        except Exception as e:
+            logger.error("Error writing embedding cache: %s", e)
+
+    async def update_products_sync_status(
+        self,
+        product_ids: List[str],
+        indexed: bool,
+        conn: Optional[asyncpg.Connection] = None,
+    ):
+        """Update sync status for products, on conn if the caller holds one"""
+        try:
+            async with db_manager.use_connection(conn) as conn:
                 now = datetime.now()
-                query = """
-                UPDATE products_new
-                SET qdrant_indexed = $1, qdrant_indexed_at = $2
-                WHERE product_id = ANY($3::text[])
-                """
-                await conn.execute(query, indexed, now, product_ids)
-                logger.info(f"Updated sync status for {len(product_ids)} products")
+                if len(product_ids) <= STATUS_UPDATE_COPY_THRESHOLD:
+                    await conn.execute(UPDATE_SYNC_STATUS_SQL, indexed, now, product_ids)
+                else:
+                    # Very large id arrays are slow to bind and plan; COPY them
+                    # into a temp table and update through a join instead
+                    async with conn.transaction():
+                        await conn.execute(
+                            "CREATE TEMP TABLE _sync_temp (product_id TEXT) ON COMMIT DROP"
+                        )
+                        await conn.copy_records_to_table(
+                            "_sync_temp", records=[(pid,) for pid in product_ids]
+                        )
+                        await conn.execute(
+                            """
+                            UPDATE products_new
+                            SET qdrant_indexed = $1, qdrant_indexed_at = $2
+                            FROM _sync_temp t
+                            WHERE products_new.product_id = t.product_id
+                            """,
+                            indexed,
+                            now,
+                        )
+                logger.info("Updated sync status for %d products", len(product_ids))
         except Exception as e:
-            logger.error(f"Error updating product sync status: {e}")
+            logger.error("Error updating product sync status: %s", e)
             raise
 
+    async def ensure_history_table(self, conn):
+        """Create the sync_history table once per process"""
+        if self._history_ready:
+            return
+        async with self._ddl_lock:
+            if self._history_ready:
+                return
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sync_history (
+                    id SERIAL PRIMARY KEY,
+                    sync_id UUID UNIQUE NOT NULL,
+                    started_at TIMESTAMP NOT NULL,
+                    completed_at TIMESTAMP NOT NULL,
+                    duration_seconds FLOAT NOT NULL,
+                    total_products INT NOT NULL,
+                    processed_products INT NOT NULL,
+                    failed_products INT NOT NULL,
+                    status VARCHAR(20) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """
+            )
+            self._history_ready = True
+
     async def record_sync_completion(
         self,
         sync_id: str,
@@ -233,30 +610,17 @@ class SyncService:
         total: int,
         processed: int,
         failed: int,
+        duration: Optional[float] = None,
+        conn: Optional[asyncpg.Connection] = None,
     ):
         """Record sync completion (create table if needed)"""
         try:
-            async with db_manager.get_connection() as conn:
-                # Create table if not exists
-                await conn.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS sync_history (
-                        id SERIAL PRIMARY KEY,
-                        sync_id UUID UNIQUE NOT NULL,
-                        started_at TIMESTAMP NOT NULL,
-                        completed_at TIMESTAMP NOT NULL,
-                        duration_seconds FLOAT NOT NULL,
-                        total_products INT NOT NULL,
-                        processed_products INT NOT NULL,
-                        failed_products INT NOT NULL,
-                        status VARCHAR(20) NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """
-                )
+            async with db_manager.use_connection(conn) as conn:
+                await self.ensure_history_table(conn)
 
                 # Record sync
-                duration = (completed_at - started_at).total_seconds()
+                if duration is None:
+                    duration = (completed_at - started_at).total_seconds()
                 status = (
                     "success"
                     if failed == 0
@@ -264,12 +628,7 @@ class SyncService:
                 )
 
                 await conn.execute(
-                    """
-                    INSERT INTO sync_history 
-                    (sync_id, started_at, completed_at, duration_seconds, 
-                     total_products, processed_products, failed_products, status)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                """,
+                    INSERT_SYNC_HISTORY_SQL,
                     sync_id,
                     started_at,
                     completed_at,
@@ -281,25 +640,12 @@ class SyncService:
                 )
 
         except Exception as e:
-            logger.error(f"Error recording sync completion: {e}")
+            logger.error("Error recording sync completion: %s", e)
 
     async def get_last_sync_info(self) -> Optional[dict]:
         """Get information about the last sync"""
         try:
             async with db_manager.get_connection() as conn:
-                # Check if table exists
-                table_exists = await conn.fetchval(
-                    """
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.tables 
-                        WHERE table_name = 'sync_history'
-                    )
-                """
-                )
-
-                if not table_exists:
-                    return None
-
                 row = await conn.fetchrow(
                     """
                     SELECT sync_id, started_at, completed_at, duration_seconds,
@@ -324,6 +670,9 @@ class SyncService:
 
                 return None
 
+        except asyncpg.UndefinedTableError:
+            # No sync has been recorded yet
+            return None
         except Exception as e:
-            logger.error(f"Error getting last sync info: {e}")
+            logger.error("Error getting last sync info: %s", e)
             return None
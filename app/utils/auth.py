@@ -1,20 +1,26 @@
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.config import settings
+import hashlib
+import hmac
 import logging
 
 logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
+# Digest of the configured token, computed once at import
+_TOKEN_HASH = hashlib.sha256(settings.ADMIN_BEARER_TOKEN.encode()).digest()
+
 
 async def verify_admin_token(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ):
     """Verify admin bearer token"""
-    if credentials.credentials != settings.ADMIN_BEARER_TOKEN:
+    incoming_hash = hashlib.sha256(credentials.credentials.encode()).digest()
+    if not hmac.compare_digest(_TOKEN_HASH, incoming_hash):
         logger.warning(
-            f"Invalid admin token attempt: {credentials.credentials[:10]}..."
+            "Invalid admin token attempt: %s...", credentials.credentials[:10]
         )
         raise HTTPException(status_code=401, detail="Invalid admin token")
     return credentials.credentials
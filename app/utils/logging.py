@@ -19,13 +19,26 @@ class CustomFormatter(logging.Formatter):
     }
     RESET = "\033[0m"
 
+    def __init__(self, use_color: bool = True):
+        super().__init__()
+        self.use_color = use_color
+        # One formatter per level, built once instead of on every record
+        if use_color:
+            self._formatters = {
+                level: logging.Formatter(color + self.FORMAT + self.RESET)
+                for level, color in self.COLORS.items()
+            }
+            self._default = logging.Formatter(self.RESET + self.FORMAT + self.RESET)
+        else:
+            self._formatters = {}
+            self._default = logging.Formatter(self.FORMAT)
+
     def format(self, record):
-        log_color = self.COLORS.get(record.levelname, self.RESET)
-        log_fmt = log_color + self.FORMAT + self.RESET
-        formatter = logging.Formatter(log_fmt)
-        return formatter.format(record)
+        return self._formatters.get(record.levelname, self._default).format(record)
 
 LOG_LEVEL = settings.LOG_LEVEL
+# Escape codes only help a terminal; log files and collectors get plain lines
+USE_COLOR = sys.stdout.isatty()
 
 # Set up the logger
 logger = logging.getLogger(__name__)
@@ -34,7 +47,7 @@ logger.setLevel(LOG_LEVEL)
 # Create a console handler
 console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setLevel(LOG_LEVEL)  # Set the handler's log level
-console_handler.setFormatter(CustomFormatter())  # Use the custom formatter
+console_handler.setFormatter(CustomFormatter(use_color=USE_COLOR))  # Use the custom formatter
 
 # Add the handler to the logger
 logger.addHandler(console_handler)